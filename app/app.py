@@ -3,12 +3,28 @@
 Task Manager avec interface web complète
 """
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import (Flask, request, jsonify, render_template_string, g,
+                   send_from_directory)
 import os
 import sqlite3
 import boto3
 from datetime import datetime
 import json
+import re
+import base64
+import hashlib
+import hmac
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+import profiling
+import snapshots
+
+# Rang numérique de la priorité (1 = la plus haute), indexé pour la file
+PRIORITY_RANKS = {'high': 1, 'medium': 2, 'low': 3}
+DEFAULT_PRIORITY_RANK = PRIORITY_RANKS['medium']
 
 
 def create_app():
@@ -16,7 +32,52 @@ def create_app():
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
 
     # Configuration base de données
-    app.config['DB_PATH'] = 'taskmanager.db'
+    app.config['DB_PATH'] = os.environ.get('DB_PATH', 'taskmanager.db')
+
+    # Utilisateur utilisé quand la requête ne précise pas d'en-tête X-User-Id
+    app.config['DEFAULT_USER_ID'] = int(
+        os.environ.get('DEFAULT_USER_ID', '1')
+    )
+
+    # Pagination de la liste des tâches (page d'accueil et fragments)
+    app.config['PAGE_SIZE'] = int(os.environ.get('PAGE_SIZE', '20'))
+    app.config['MAX_PAGE_SIZE'] = 100
+
+    # Clés d'idempotence pour POST /api/tasks
+    app.config['IDEMPOTENCY_TTL'] = int(
+        os.environ.get('IDEMPOTENCY_TTL', '86400')
+    )
+    app.config['IDEMPOTENCY_MAX_KEYS'] = int(
+        os.environ.get('IDEMPOTENCY_MAX_KEYS', '10000')
+    )
+    app.config['IDEMPOTENCY_WAIT_TIMEOUT'] = 30
+
+    # File de travail : durée des baux posés par POST /api/tasks/claim
+    app.config['LEASE_SECONDS'] = int(os.environ.get('LEASE_SECONDS', '60'))
+    app.config['MAX_LEASE_SECONDS'] = 3600
+    app.config['MAX_CLAIM'] = 100
+
+    # Profilage à la demande : en-tête X-Profile égal à PROFILE_TOKEN, ou
+    # échantillonnage d'une fraction du trafic (0 = désactivé)
+    app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')
+    app.config['PROFILE_SAMPLE_RATE'] = float(
+        os.environ.get('PROFILE_SAMPLE_RATE', '0')
+    )
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'profiles')
+    app.config['PROFILE_MAX_FILES'] = int(
+        os.environ.get('PROFILE_MAX_FILES', '50')
+    )
+    app.config['PROFILE_INTERVAL'] = float(
+        os.environ.get('PROFILE_INTERVAL', '0.001')
+    )
+
+    # Snapshots en ligne de la base, en secondes (0 = désactivés)
+    app.config['SNAPSHOT_INTERVAL'] = int(
+        os.environ.get('SNAPSHOT_INTERVAL', '0')
+    )
+    # Déclenchement et restauration par HTTP : en-tête X-Admin-Token égal à
+    # SNAPSHOT_TOKEN (routes désactivées sans jeton)
+    app.config['SNAPSHOT_TOKEN'] = os.environ.get('SNAPSHOT_TOKEN')
 
     # Configuration AWS
     try:
@@ -28,10 +89,29 @@ def create_app():
         lambda_client = None
         aws_available = False
 
+    # S3 si SNAPSHOT_BUCKET est défini, sinon répertoire local
+    snapshot_store = snapshots.make_store(s3_client)
+
+    def get_db():
+        conn = sqlite3.connect(app.config['DB_PATH'])
+        conn.row_factory = sqlite3.Row
+        return conn
+
     # Initialiser SQLite
     def init_db():
         conn = sqlite3.connect(app.config['DB_PATH'])
+        # WAL : les lectures (dont les snapshots) ne bloquent pas les
+        # écritures
+        conn.execute('PRAGMA journal_mode=WAL')
         conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute(f'''
             CREATE TABLE IF NOT EXISTS tasks (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 title TEXT NOT NULL,
@@ -39,10 +119,67 @@ def create_app():
                 completed BOOLEAN DEFAULT 0,
                 priority TEXT DEFAULT 'medium',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                user_id INTEGER NOT NULL
+                    DEFAULT {app.config['DEFAULT_USER_ID']} REFERENCES users(id),
+                priority_rank INTEGER NOT NULL DEFAULT 2,
+                lease_owner TEXT,
+                lease_expires_at REAL
             )
         ''')
 
+        # Migration des bases créées avant l'ajout des propriétaires :
+        # les tâches existantes sont rattachées à l'utilisateur par défaut
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(tasks)')]
+        if 'user_id' not in columns:
+            conn.execute(
+                'ALTER TABLE tasks ADD COLUMN user_id INTEGER NOT NULL '
+                f"DEFAULT {app.config['DEFAULT_USER_ID']}"
+            )
+        if 'priority_rank' not in columns:
+            conn.execute(
+                'ALTER TABLE tasks ADD COLUMN priority_rank INTEGER '
+                f'NOT NULL DEFAULT {DEFAULT_PRIORITY_RANK}'
+            )
+            conn.execute(
+                "UPDATE tasks SET priority_rank = CASE priority "
+                "WHEN 'high' THEN 1 WHEN 'low' THEN 3 ELSE 2 END"
+            )
+        if 'lease_owner' not in columns:
+            conn.execute('ALTER TABLE tasks ADD COLUMN lease_owner TEXT')
+            conn.execute('ALTER TABLE tasks ADD COLUMN lease_expires_at REAL')
+
+        # Index composites : chaque requête ne parcourt que les lignes
+        # de l'utilisateur concerné
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_tasks_user_completed_created '
+            'ON tasks (user_id, completed, created_at)'
+        )
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_tasks_user_created '
+            'ON tasks (user_id, created_at)'
+        )
+        conn.execute('DROP INDEX IF EXISTS idx_tasks_user_priority_completed')
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS '
+            'idx_tasks_user_priority_completed_created '
+            'ON tasks (user_id, priority, completed, created_at)'
+        )
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_tasks_user_priority_created '
+            'ON tasks (user_id, priority, created_at)'
+        )
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_tasks_user_queue '
+            'ON tasks (user_id, completed, priority_rank, created_at)'
+        )
+
+        conn.execute(
+            'INSERT OR IGNORE INTO users (id, username, email) '
+            'VALUES (?, ?, ?)',
+            (app.config['DEFAULT_USER_ID'], 'demo', 'demo@taskmanager.local')
+        )
+
         # Données de démonstration
         existing = conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
         if existing == 0:
@@ -70,8 +207,10 @@ def create_app():
             for title, desc, priority, completed in demo_tasks:
                 conn.execute(
                     ('INSERT INTO tasks (title, description, priority, '
-                     'completed) VALUES (?, ?, ?, ?)'),
-                    (title, desc, priority, completed)
+                     'priority_rank, completed, user_id) '
+                     'VALUES (?, ?, ?, ?, ?, ?)'),
+                    (title, desc, priority, PRIORITY_RANKS[priority],
+                     completed, app.config['DEFAULT_USER_ID'])
                 )
 
         conn.commit()
@@ -79,6 +218,340 @@ def create_app():
 
     init_db()
 
+    # Statistiques par utilisateur : le cache d'un utilisateur n'est
+    # invalidé que par ses propres écritures. Le compteur de génération
+    # empêche de remettre en cache un résultat calculé avant une écriture.
+    stats_cache = {}
+    stats_generation = {}
+    stats_resets = [0]
+    stats_lock = threading.Lock()
+
+    def current_user_id():
+        """Identifiant de l'utilisateur de la requête (en-tête X-User-Id).
+
+        L'en-tête n'est pas authentifié : il doit être posé par un reverse
+        proxy de confiance, ce n'est pas un contrôle d'accès.
+        """
+        raw = request.headers.get('X-User-Id')
+        if raw is None:
+            return app.config['DEFAULT_USER_ID']
+        try:
+            user_id = int(raw)
+        except ValueError:
+            return None
+        # Hors de la plage des entiers SQLite (64 bits signés) : invalide
+        if not 0 < user_id < 2 ** 63:
+            return None
+        return user_id
+
+    def invalidate_user_stats(user_id):
+        with stats_lock:
+            stats_cache.pop(user_id, None)
+            stats_generation[user_id] = stats_generation.get(user_id, 0) + 1
+
+    def get_user_stats(conn, user_id):
+        with stats_lock:
+            cached = stats_cache.get(user_id)
+            generation = (stats_resets[0], stats_generation.get(user_id, 0))
+        if cached is not None:
+            return cached
+
+        # Comptages résolus sur les index (user_id, ...) sans lire la table
+        counts = dict(conn.execute(
+            'SELECT completed, COUNT(*) FROM tasks '
+            'WHERE user_id = ? GROUP BY completed',
+            (user_id,)
+        ).fetchall())
+        high_priority = conn.execute(
+            'SELECT COUNT(*) FROM tasks '
+            "WHERE user_id = ? AND priority = 'high' AND completed = 0",
+            (user_id,)
+        ).fetchone()[0]
+        completed = sum(n for flag, n in counts.items() if flag)
+        pending = sum(n for flag, n in counts.items() if not flag)
+        stats = {
+            'total': completed + pending,
+            'completed': completed,
+            'pending': pending,
+            'high_priority': high_priority
+        }
+
+        # Seuls les utilisateurs existants sont mis en cache : l'en-tête
+        # X-User-Id n'étant pas authentifié, le cache grossirait sans limite
+        exists = conn.execute(
+            'SELECT 1 FROM users WHERE id = ?', (user_id,)
+        ).fetchone()
+        with stats_lock:
+            if exists and (stats_resets[0],
+                           stats_generation.get(user_id, 0)) == generation:
+                stats_cache[user_id] = stats
+        return stats
+
+    # Réponses déjà servies par clé d'idempotence, par ordre d'insertion
+    # (les plus anciennes expirent en premier). Une entrée sans réponse
+    # correspond à une requête encore en cours.
+    idempotency_entries = OrderedDict()
+    idempotency_lock = threading.Lock()
+
+    def purge_idempotency_entries(now):
+        excess = (len(idempotency_entries) -
+                  app.config['IDEMPOTENCY_MAX_KEYS'])
+        stale = []
+        for scope, entry in idempotency_entries.items():
+            if entry['expires_at'] > now and len(stale) >= excess:
+                break
+            # Les requêtes en cours restent jusqu'à leur fin
+            if entry['response'] is not None:
+                stale.append(scope)
+        for scope in stale:
+            del idempotency_entries[scope]
+
+    def idempotency_begin(scope, fingerprint):
+        """Réserve une clé d'idempotence.
+
+        Renvoie ('owner', entrée) si la requête doit être exécutée,
+        ('replay', entrée) si une réponse est déjà enregistrée,
+        ('conflict', None) si la clé a servi pour un autre corps et
+        ('timeout', None) si la requête d'origine ne s'est pas terminée.
+        Les doublons concurrents attendent la fin de la première requête.
+        """
+        deadline = time.monotonic() + app.config['IDEMPOTENCY_WAIT_TIMEOUT']
+        while True:
+            with idempotency_lock:
+                now = time.monotonic()
+                purge_idempotency_entries(now)
+                entry = idempotency_entries.get(scope)
+                if entry is None:
+                    entry = {
+                        'fingerprint': fingerprint,
+                        'response': None,
+                        'done': threading.Event(),
+                        'expires_at': now + app.config['IDEMPOTENCY_TTL']
+                    }
+                    idempotency_entries[scope] = entry
+                    return 'owner', entry
+
+            if entry['fingerprint'] != fingerprint:
+                return 'conflict', None
+            if entry['response'] is not None:
+                return 'replay', entry
+            if not entry['done'].wait(max(0, deadline - time.monotonic())):
+                return 'timeout', None
+            # La requête d'origine a échoué sans réponse : on réessaie
+
+    def idempotency_finish(scope, entry, response):
+        with idempotency_lock:
+            if response is None:
+                idempotency_entries.pop(scope, None)
+            else:
+                entry['response'] = response
+        entry['done'].set()
+
+    # Snapshots : un seul à la fois, en tâche de fond. Les latences des
+    # requêtes sont séparées selon qu'un snapshot était en cours ou non
+    # pour mesurer son effet sur le p99.
+    snapshot_lock = threading.Lock()
+    snapshot_active = threading.Event()
+    snapshot_metrics = {'count': 0, 'last': None, 'last_error': None}
+    request_latencies = {
+        'idle': deque(maxlen=2048),
+        'snapshot': deque(maxlen=2048)
+    }
+
+    def reset_caches():
+        """Vide les caches en mémoire après un changement global de la base."""
+        with stats_lock:
+            stats_cache.clear()
+            stats_resets[0] += 1
+        with idempotency_lock:
+            idempotency_entries.clear()
+
+    def run_snapshot():
+        if not snapshot_lock.acquire(blocking=False):
+            return None
+        snapshot_active.set()
+        try:
+            result = snapshots.take_snapshot(
+                app.config['DB_PATH'], snapshot_store
+            )
+            snapshot_metrics['count'] += 1
+            snapshot_metrics['last'] = result
+            snapshot_metrics['last_error'] = None
+            return result
+        except Exception as e:
+            snapshot_metrics['last_error'] = str(e)
+            return None
+        finally:
+            snapshot_active.clear()
+            snapshot_lock.release()
+
+    def snapshot_loop():
+        while True:
+            time.sleep(app.config['SNAPSHOT_INTERVAL'])
+            run_snapshot()
+
+    if app.config['SNAPSHOT_INTERVAL'] > 0:
+        threading.Thread(target=snapshot_loop, daemon=True).start()
+
+    def percentile(values, pct):
+        values = sorted(values)
+        if not values:
+            return None
+        return round(values[min(len(values) - 1,
+                                int(len(values) * pct / 100))], 2)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+        g.during_snapshot = snapshot_active.is_set()
+
+    @app.after_request
+    def record_request_latency(response):
+        elapsed = (time.perf_counter() - g.request_start) * 1000
+        during_snapshot = g.during_snapshot or snapshot_active.is_set()
+        request_latencies['snapshot' if during_snapshot else 'idle'].append(
+            elapsed
+        )
+        return response
+
+    def has_profile_token():
+        token = app.config['PROFILE_TOKEN']
+        supplied = request.headers.get('X-Profile')
+        # Comparaison en octets : sur des str, compare_digest refuse les
+        # caractères non ASCII (TypeError, donc 500)
+        return bool(token and supplied and
+                    hmac.compare_digest(supplied.encode(), token.encode()))
+
+    # Les hooks ne sont enregistrés que si le profilage est configuré :
+    # désactivé, il ne coûte rien aux requêtes
+    if app.config['PROFILE_TOKEN'] or app.config['PROFILE_SAMPLE_RATE'] > 0:
+        @app.before_request
+        def start_profiler():
+            # Ni les routes de consultation des profils ni les 404 : leurs
+            # captures chasseraient les vraies de la rotation
+            if request.endpoint in (None, 'get_profiles', 'get_profile'):
+                return
+            if not (has_profile_token() or
+                    random.random() < app.config['PROFILE_SAMPLE_RATE']):
+                return
+            g.profiler = profiling.StackSampler(
+                threading.get_ident(), app.config['PROFILE_INTERVAL']
+            )
+            g.profiler.start()
+
+        @app.after_request
+        def save_profile(response):
+            sampler = g.pop('profiler', None)
+            if sampler is None:
+                return response
+            sampler.stop()
+            name = profiling.write_profile(
+                app.config['PROFILE_DIR'], sampler, {
+                    'method': request.method,
+                    'path': request.path,
+                    'endpoint': request.endpoint or 'unknown',
+                    'status': response.status_code
+                },
+                max_files=app.config['PROFILE_MAX_FILES']
+            )
+            response.headers['X-Profile-Id'] = name
+            return response
+
+        @app.teardown_request
+        def stop_profiler(exc):
+            # Requête en erreur : after_request n'a pas arrêté l'échantillonneur
+            sampler = g.pop('profiler', None)
+            if sampler is not None:
+                sampler.stop()
+
+    TASK_STATUSES = ('pending', 'completed')
+    TASK_PRIORITIES = ('high', 'medium', 'low')
+
+    def encode_cursor(task):
+        raw = f"{task['created_at']}|{task['id']}".encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(cursor):
+        try:
+            created_at, task_id = (
+                base64.urlsafe_b64decode(cursor.encode()).decode()
+                .rsplit('|', 1)
+            )
+            task_id = int(task_id)
+        except ValueError:
+            return None
+        if not 0 < task_id < 2 ** 63:
+            return None
+        return created_at, task_id
+
+    def fetch_task_page(conn, user_id, status=None, priority=None,
+                        cursor=None, limit=None):
+        """Une page de tâches triée par (created_at, id) décroissants.
+
+        Pagination par curseur (keyset) : la page suivante reprend après la
+        dernière tâche renvoyée, sans OFFSET, donc en temps constant quelle
+        que soit la profondeur dans la liste.
+        """
+        limit = limit or app.config['PAGE_SIZE']
+        where = 'user_id = ?'
+        filters = [user_id]
+        if status:
+            where += ' AND completed = ?'
+            filters.append(1 if status == 'completed' else 0)
+        if priority:
+            where += ' AND priority = ?'
+            filters.append(priority)
+        order = ' ORDER BY created_at DESC, id DESC LIMIT ?'
+
+        if cursor:
+            # (created_at, id) < curseur, en deux parcours d'index bornés :
+            # SQLite ne borne que sur created_at et relirait sinon toutes
+            # les tâches de même date déjà servies. Les ex aequo sont bornés
+            # par l'id (rowid, dernière colonne implicite de l'index).
+            created_at, task_id = cursor
+            query = (
+                f'SELECT * FROM (SELECT * FROM tasks WHERE {where} '
+                'AND created_at = ? AND id < ? ORDER BY id DESC LIMIT ?) '
+                f'UNION ALL SELECT * FROM (SELECT * FROM tasks WHERE {where} '
+                f'AND created_at < ?{order}){order}'
+            )
+            params = (filters + [created_at, task_id, limit + 1]
+                      + filters + [created_at, limit + 1, limit + 1])
+        else:
+            query = f'SELECT * FROM tasks WHERE {where}{order}'
+            params = filters + [limit + 1]
+
+        tasks = [dict(task) for task in conn.execute(query, params)]
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = encode_cursor(tasks[-1])
+        return tasks, next_cursor
+
+    def parse_page_args():
+        """Lit status / priority / cursor / limit ; None si invalide."""
+        status = request.args.get('status') or None
+        priority = request.args.get('priority') or None
+        if status not in (None,) + TASK_STATUSES:
+            return None
+        if priority not in (None,) + TASK_PRIORITIES:
+            return None
+
+        cursor = request.args.get('cursor')
+        if cursor:
+            cursor = decode_cursor(cursor)
+            if cursor is None:
+                return None
+
+        try:
+            limit = int(request.args.get('limit', app.config['PAGE_SIZE']))
+        except ValueError:
+            return None
+        limit = max(1, min(limit, app.config['MAX_PAGE_SIZE']))
+
+        return {'status': status, 'priority': priority,
+                'cursor': cursor, 'limit': limit}
+
     # Template HTML pour l'interface
     HTML_TEMPLATE = '''
     <!DOCTYPE html>
@@ -326,6 +799,25 @@ def create_app():
                 transition: all 0.3s;
             }
 
+            .task-filters {
+                display: flex;
+                gap: 10px;
+                margin-bottom: 15px;
+            }
+
+            .task-filters select {
+                flex: 1;
+                padding: 8px;
+                border: 2px solid #e0e0e0;
+                border-radius: 8px;
+            }
+
+            .task-sentinel {
+                text-align: center;
+                color: #888;
+                padding: 10px;
+            }
+
             .toggle-btn:hover {
                 background: #007bff;
                 color: white;
@@ -404,19 +896,25 @@ def create_app():
 
                 <div class="task-list">
                     <h3>📋 Liste des taches</h3>
+                    <form class="task-filters" method="get" action="/">
+                        <select name="status" onchange="this.form.submit()">
+                            <option value="">Tous les statuts</option>
+                            <option value="pending" {% if filters.status == 'pending' %}selected{% endif %}>En cours</option>
+                            <option value="completed" {% if filters.status == 'completed' %}selected{% endif %}>Terminees</option>
+                        </select>
+                        <select name="priority" onchange="this.form.submit()">
+                            <option value="">Toutes priorites</option>
+                            <option value="high" {% if filters.priority == 'high' %}selected{% endif %}>🔴 Haute</option>
+                            <option value="medium" {% if filters.priority == 'medium' %}selected{% endif %}>🟡 Moyenne</option>
+                            <option value="low" {% if filters.priority == 'low' %}selected{% endif %}>🟢 Basse</option>
+                        </select>
+                    </form>
                     <div id="taskContainer">
-                        {% for task in tasks %}
-                        <div class="task-item {{ task.priority }} {% if task.completed %}completed{% endif %}" data-id="{{ task.id }}">
-                            <div class="task-title">{{ task.title }}</div>
-                            <div class="task-description">{{ task.description or 'Aucune description' }}</div>
-                            <div class="task-meta">
-                                <span class="priority-badge priority-{{ task.priority }}">{{ task.priority.upper() }}</span>
-                                <button class="toggle-btn" onclick="toggleTask({{ task.id }}, {{ task.completed }})">
-                                    {% if task.completed %}❌ Annuler{% else %}✅ Terminer{% endif %}
-                                </button>
-                            </div>
-                        </div>
-                        {% endfor %}
+                        {{ task_items|safe }}
+                    </div>
+                    <div id="taskSentinel" class="task-sentinel"
+                         data-cursor="{{ next_cursor or '' }}">
+                        {% if next_cursor %}Chargement...{% endif %}
                     </div>
                 </div>
 
@@ -461,7 +959,13 @@ def create_app():
         </div>
 
         <script>
-            // Soumission du formulaire
+            // Soumission du formulaire (la cle est conservee entre les
+            // tentatives pour ne pas creer de doublon)
+            function newIdempotencyKey() {
+                return Date.now().toString(36) +
+                    Math.random().toString(36).slice(2);
+            }
+            let idempotencyKey = newIdempotencyKey();
             document.getElementById('taskForm').addEventListener('submit', async function(e) {
                 e.preventDefault();
 
@@ -473,6 +977,7 @@ def create_app():
                         method: 'POST',
                         headers: {
                             'Content-Type': 'application/json',
+                            'Idempotency-Key': idempotencyKey,
                         },
                         body: JSON.stringify(data)
                     });
@@ -480,6 +985,14 @@ def create_app():
                     if (response.ok) {
                         location.reload();
                     } else {
+                        // Nouvelle cle seulement si la requete a ete
+                        // rejetee (4xx) ; sur 409 (requete d'origine
+                        // encore en cours) ou 5xx, un nouvel essai doit
+                        // reutiliser la meme cle
+                        if (response.status >= 400 && response.status < 500 &&
+                                response.status !== 409) {
+                            idempotencyKey = newIdempotencyKey();
+                        }
                         alert('Erreur lors de la creation de la tache');
                     }
                 } catch (error) {
@@ -506,6 +1019,40 @@ def create_app():
                 }
             }
 
+            // Chargement des pages suivantes au defilement
+            const sentinel = document.getElementById('taskSentinel');
+            let loadingPage = false;
+
+            async function loadNextPage() {
+                const cursor = sentinel.dataset.cursor;
+                if (!cursor || loadingPage) return;
+                loadingPage = true;
+
+                const params = new URLSearchParams(window.location.search);
+                params.set('cursor', cursor);
+                try {
+                    const response = await fetch(`/tasks/page?${params}`);
+                    if (response.ok) {
+                        const html = await response.text();
+                        document.getElementById('taskContainer')
+                            .insertAdjacentHTML('beforeend', html);
+                        sentinel.dataset.cursor =
+                            response.headers.get('X-Next-Cursor') || '';
+                        if (!sentinel.dataset.cursor) {
+                            sentinel.textContent = '';
+                        }
+                    }
+                } finally {
+                    loadingPage = false;
+                }
+            }
+
+            new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) {
+                    loadNextPage();
+                }
+            }).observe(sentinel);
+
             // Mettre a jour l'horloge
             function updateTime() {
                 const now = new Date();
@@ -517,32 +1064,65 @@ def create_app():
     </html>
     '''
 
+    # Fragment HTML d'une page de tâches (rendu initial et défilement)
+    TASK_ITEMS_TEMPLATE = '''
+    {% for task in tasks %}
+    <div class="task-item {{ task.priority }} {% if task.completed %}completed{% endif %}" data-id="{{ task.id }}">
+        <div class="task-title">{{ task.title }}</div>
+        <div class="task-description">{{ task.description or 'Aucune description' }}</div>
+        <div class="task-meta">
+            <span class="priority-badge priority-{{ task.priority }}">{{ task.priority.upper() }}</span>
+            <button class="toggle-btn" onclick="toggleTask({{ task.id }}, {{ task.completed }})">
+                {% if task.completed %}❌ Annuler{% else %}✅ Terminer{% endif %}
+            </button>
+        </div>
+    </div>
+    {% endfor %}
+    '''
+
     # Routes
     @app.route('/')
     def index():
-        # Récupérer les tâches
-        conn = sqlite3.connect(app.config['DB_PATH'])
-        conn.row_factory = sqlite3.Row
+        user_id = current_user_id()
+        if user_id is None:
+            return jsonify({'error': 'Invalid X-User-Id header'}), 400
 
-        tasks = conn.execute(
-            'SELECT * FROM tasks ORDER BY created_at DESC'
-        ).fetchall()
-        tasks = [dict(task) for task in tasks]
+        page_args = parse_page_args()
+        if page_args is None:
+            return jsonify({'error': 'Invalid filter or cursor'}), 400
 
-        # Calculer les statistiques
-        stats = {
-            'total': len(tasks),
-            'completed': len([t for t in tasks if t['completed']]),
-            'pending': len([t for t in tasks if not t['completed']]),
-            'high_priority': len([
-                t for t in tasks
-                if t['priority'] == 'high' and not t['completed']
-            ])
-        }
+        # Une seule page est rendue, la suite est chargée au défilement
+        # depuis /tasks/page
+        conn = get_db()
+        tasks, next_cursor = fetch_task_page(conn, user_id, **page_args)
+
+        # Statistiques (mises en cache par utilisateur)
+        stats = get_user_stats(conn, user_id)
+
+        conn.close()
+
+        task_items = render_template_string(TASK_ITEMS_TEMPLATE, tasks=tasks)
+        return render_template_string(
+            HTML_TEMPLATE, task_items=task_items, next_cursor=next_cursor,
+            filters=page_args, stats=stats
+        )
 
+    @app.route('/tasks/page')
+    def task_page():
+        user_id = current_user_id()
+        if user_id is None:
+            return jsonify({'error': 'Invalid X-User-Id header'}), 400
+
+        page_args = parse_page_args()
+        if page_args is None:
+            return jsonify({'error': 'Invalid filter or cursor'}), 400
+
+        conn = get_db()
+        tasks, next_cursor = fetch_task_page(conn, user_id, **page_args)
         conn.close()
 
-        return render_template_string(HTML_TEMPLATE, tasks=tasks, stats=stats)
+        html = render_template_string(TASK_ITEMS_TEMPLATE, tasks=tasks)
+        return html, 200, {'X-Next-Cursor': next_cursor or ''}
 
     @app.route('/health')
     def health():
@@ -552,31 +1132,88 @@ def create_app():
             'aws_available': aws_available
         })
 
+    @app.route('/api/users', methods=['POST'])
+    def create_user():
+        data = request.get_json()
+
+        if not data.get('username') or not data.get('email'):
+            return jsonify({'error': 'Username and email required'}), 400
+
+        conn = get_db()
+        try:
+            cursor = conn.execute(
+                'INSERT INTO users (username, email) VALUES (?, ?)',
+                (data['username'], data['email'])
+            )
+        except sqlite3.IntegrityError:
+            conn.close()
+            return jsonify({'error': 'User already exists'}), 409
+        conn.commit()
+
+        user = conn.execute(
+            'SELECT * FROM users WHERE id = ?', (cursor.lastrowid,)
+        ).fetchone()
+        conn.close()
+
+        return jsonify(dict(user)), 201
+
+    @app.route('/api/stats', methods=['GET'])
+    def get_stats():
+        user_id = current_user_id()
+        if user_id is None:
+            return jsonify({'error': 'Invalid X-User-Id header'}), 400
+
+        conn = get_db()
+        stats = get_user_stats(conn, user_id)
+        conn.close()
+        return jsonify(stats)
+
     @app.route('/api/tasks', methods=['GET'])
     def get_tasks():
-        conn = sqlite3.connect(app.config['DB_PATH'])
-        conn.row_factory = sqlite3.Row
-        tasks = conn.execute(
-            'SELECT * FROM tasks ORDER BY created_at DESC'
-        ).fetchall()
+        user_id = current_user_id()
+        if user_id is None:
+            return jsonify({'error': 'Invalid X-User-Id header'}), 400
+
+        # Filtres optionnels : ?completed=0|1 et recherche ?q=...
+        query = 'SELECT * FROM tasks WHERE user_id = ?'
+        params = [user_id]
+        completed = request.args.get('completed')
+        if completed is not None:
+            query += ' AND completed = ?'
+            params.append(1 if completed in ('1', 'true') else 0)
+        search = request.args.get('q')
+        if search:
+            query += ' AND (title LIKE ? OR description LIKE ?)'
+            params.extend([f'%{search}%', f'%{search}%'])
+        query += ' ORDER BY created_at DESC'
+
+        conn = get_db()
+        tasks = conn.execute(query, params).fetchall()
         conn.close()
         return jsonify([dict(task) for task in tasks])
 
-    @app.route('/api/tasks', methods=['POST'])
-    def create_task():
-        data = request.get_json()
-
+    def insert_task(user_id, data):
         if not data.get('title'):
-            return jsonify({'error': 'Title required'}), 400
+            return {'error': 'Title required'}, 400
 
-        conn = sqlite3.connect(app.config['DB_PATH'])
+        conn = get_db()
+        user = conn.execute(
+            'SELECT id FROM users WHERE id = ?', (user_id,)
+        ).fetchone()
+        if user is None:
+            conn.close()
+            return {'error': 'User not found'}, 404
+
+        priority = data.get('priority', 'medium')
         cursor = conn.execute(
-            'INSERT INTO tasks (title, description, priority) VALUES (?, ?, ?)',
-            (data['title'], data.get('description', ''),
-             data.get('priority', 'medium'))
+            ('INSERT INTO tasks (title, description, priority, '
+             'priority_rank, user_id) VALUES (?, ?, ?, ?, ?)'),
+            (data['title'], data.get('description', ''), priority,
+             PRIORITY_RANKS.get(priority, DEFAULT_PRIORITY_RANK), user_id)
         )
         task_id = cursor.lastrowid
         conn.commit()
+        invalidate_user_stats(user_id)
 
         # Récupérer la tâche créée
         task = conn.execute(
@@ -592,6 +1229,7 @@ def create_app():
                     InvocationType='Event',
                     Payload=json.dumps({
                         'task_id': task_id,
+                        'user_id': user_id,
                         'action': 'created',
                         'title': data['title']
                     })
@@ -599,13 +1237,57 @@ def create_app():
             except Exception:
                 pass
 
-        return jsonify(dict(task)), 201
+        return dict(task), 201
+
+    @app.route('/api/tasks', methods=['POST'])
+    def create_task():
+        user_id = current_user_id()
+        if user_id is None:
+            return jsonify({'error': 'Invalid X-User-Id header'}), 400
+
+        data = request.get_json()
+
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            body, status = insert_task(user_id, data)
+            return jsonify(body), status
+        if not key or len(key) > 255:
+            return jsonify({'error': 'Invalid Idempotency-Key header'}), 400
+
+        # Une nouvelle tentative avec la même clé rejoue la réponse
+        # d'origine sans toucher à la table ni à AWS
+        scope = (user_id, key)
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+        outcome, entry = idempotency_begin(scope, fingerprint)
+        if outcome == 'conflict':
+            return jsonify({
+                'error': 'Idempotency-Key reused with a different payload'
+            }), 422
+        if outcome == 'timeout':
+            return jsonify({
+                'error': 'Request with this Idempotency-Key still in progress'
+            }), 409
+        if outcome == 'replay':
+            body, status = entry['response']
+            return jsonify(body), status, {'Idempotent-Replayed': 'true'}
+
+        response = None
+        try:
+            response = insert_task(user_id, data)
+        finally:
+            idempotency_finish(scope, entry, response)
+        body, status = response
+        return jsonify(body), status
 
     @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
     def update_task(task_id):
+        user_id = current_user_id()
+        if user_id is None:
+            return jsonify({'error': 'Invalid X-User-Id header'}), 400
+
         data = request.get_json()
 
-        conn = sqlite3.connect(app.config['DB_PATH'])
+        conn = get_db()
 
         # Construire la requête de mise à jour
         updates = []
@@ -623,17 +1305,24 @@ def create_app():
         if 'priority' in data:
             updates.append('priority = ?')
             params.append(data['priority'])
+            updates.append('priority_rank = ?')
+            params.append(PRIORITY_RANKS.get(data['priority'],
+                                             DEFAULT_PRIORITY_RANK))
 
         updates.append('updated_at = CURRENT_TIMESTAMP')
-        params.append(task_id)
+        params.extend([task_id, user_id])
 
-        query = f'UPDATE tasks SET {", ".join(updates)} WHERE id = ?'
-        conn.execute(query, params)
+        query = (f'UPDATE tasks SET {", ".join(updates)} '
+                 'WHERE id = ? AND user_id = ?')
+        cursor = conn.execute(query, params)
         conn.commit()
+        if cursor.rowcount:
+            invalidate_user_stats(user_id)
 
         # Récupérer la tâche mise à jour
         task = conn.execute(
-            'SELECT * FROM tasks WHERE id = ?', (task_id,)
+            'SELECT * FROM tasks WHERE id = ? AND user_id = ?',
+            (task_id, user_id)
         ).fetchone()
         conn.close()
 
@@ -641,12 +1330,257 @@ def create_app():
 
     @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
     def delete_task(task_id):
-        conn = sqlite3.connect(app.config['DB_PATH'])
-        conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+        user_id = current_user_id()
+        if user_id is None:
+            return jsonify({'error': 'Invalid X-User-Id header'}), 400
+
+        conn = get_db()
+        cursor = conn.execute(
+            'DELETE FROM tasks WHERE id = ? AND user_id = ?',
+            (task_id, user_id)
+        )
         conn.commit()
         conn.close()
+        if cursor.rowcount:
+            invalidate_user_stats(user_id)
+
+        return jsonify({'deleted': bool(cursor.rowcount)})
+
+    # Sérialise les écritures de baux dans le processus : sans lui, les
+    # workers concurrents se bloquent sur le verrou SQLite et le gestionnaire
+    # d'attente (pauses croissantes jusqu'à 100 ms) fait exploser le p99.
+    # Entre processus, l'atomicité reste assurée par SQLite.
+    queue_lock = threading.Lock()
+
+    def parse_lease_seconds(data):
+        try:
+            seconds = int(data.get('lease_seconds',
+                                   app.config['LEASE_SECONDS']))
+        except (TypeError, ValueError):
+            return None
+        return max(1, min(seconds, app.config['MAX_LEASE_SECONDS']))
+
+    def parse_worker_id(data):
+        worker_id = data.get('worker_id')
+        if not isinstance(worker_id, str) or not 0 < len(worker_id) <= 200:
+            return None
+        return worker_id
+
+    def get_json_object():
+        data = request.get_json(silent=True)
+        return data if isinstance(data, dict) else {}
+
+    @app.route('/api/tasks/claim', methods=['POST'])
+    def claim_tasks():
+        """Pose un bail sur les N tâches en attente les plus prioritaires.
+
+        Les tâches dont le bail a expiré redeviennent disponibles. La
+        sélection et la mise à jour forment une seule instruction
+        UPDATE ... RETURNING : deux workers ne peuvent pas obtenir la même
+        tâche, et le verrou d'écriture n'est tenu que le temps de celle-ci.
+        """
+        user_id = current_user_id()
+        if user_id is None:
+            return jsonify({'error': 'Invalid X-User-Id header'}), 400
+
+        data = get_json_object()
+        worker_id = parse_worker_id(data)
+        if worker_id is None:
+            return jsonify({'error': 'worker_id required'}), 400
+        lease_seconds = parse_lease_seconds(data)
+        try:
+            limit = int(data.get('limit', 1))
+        except (TypeError, ValueError):
+            limit = None
+        if lease_seconds is None or limit is None:
+            return jsonify({'error': 'Invalid limit or lease_seconds'}), 400
+        limit = max(1, min(limit, app.config['MAX_CLAIM']))
+
+        now = time.time()
+        expires_at = now + lease_seconds
+        conn = get_db()
+        # La sous-requête parcourt l'index (user_id, completed,
+        # priority_rank, created_at) : seules les tâches sous bail actif
+        # sont sautées
+        with queue_lock:
+            tasks = [dict(task) for task in conn.execute(
+                'UPDATE tasks SET lease_owner = ?, lease_expires_at = ? '
+                'WHERE id IN ('
+                '    SELECT id FROM tasks '
+                '    WHERE user_id = ? AND completed = 0 '
+                '    AND (lease_expires_at IS NULL OR lease_expires_at <= ?) '
+                '    ORDER BY priority_rank, created_at, id LIMIT ?'
+                ') RETURNING *',
+                (worker_id, expires_at, user_id, now, limit)
+            ).fetchall()]
+            conn.commit()
+        conn.close()
 
-        return jsonify({'deleted': True})
+        # RETURNING ne garantit pas l'ordre des lignes
+        tasks.sort(key=lambda t: (t['priority_rank'], t['created_at'], t['id']))
+
+        return jsonify({'lease_expires_at': expires_at, 'tasks': tasks})
+
+    @app.route('/api/tasks/<int:task_id>/heartbeat', methods=['POST'])
+    def heartbeat_task(task_id):
+        user_id = current_user_id()
+        if user_id is None:
+            return jsonify({'error': 'Invalid X-User-Id header'}), 400
+
+        data = get_json_object()
+        worker_id = parse_worker_id(data)
+        lease_seconds = parse_lease_seconds(data)
+        if worker_id is None or lease_seconds is None:
+            return jsonify({
+                'error': 'worker_id and valid lease_seconds required'
+            }), 400
+
+        # Prolonge le bail seulement s'il appartient encore au worker
+        now = time.time()
+        expires_at = now + lease_seconds
+        conn = get_db()
+        with queue_lock:
+            cursor = conn.execute(
+                'UPDATE tasks SET lease_expires_at = ? '
+                'WHERE id = ? AND user_id = ? AND lease_owner = ? '
+                'AND lease_expires_at > ?',
+                (expires_at, task_id, user_id, worker_id, now)
+            )
+            conn.commit()
+        conn.close()
+
+        if not cursor.rowcount:
+            return jsonify({'error': 'Lease not held'}), 409
+        return jsonify({'id': task_id, 'lease_expires_at': expires_at})
+
+    @app.route('/api/tasks/<int:task_id>/release', methods=['POST'])
+    def release_task(task_id):
+        user_id = current_user_id()
+        if user_id is None:
+            return jsonify({'error': 'Invalid X-User-Id header'}), 400
+
+        data = get_json_object()
+        worker_id = parse_worker_id(data)
+        if worker_id is None:
+            return jsonify({'error': 'worker_id required'}), 400
+
+        # Libère le bail, en marquant éventuellement la tâche terminée
+        completed = bool(data.get('completed'))
+        conn = get_db()
+        with queue_lock:
+            cursor = conn.execute(
+                'UPDATE tasks SET lease_owner = NULL, '
+                'lease_expires_at = NULL, '
+                'completed = CASE WHEN ? THEN 1 ELSE completed END, '
+                'updated_at = CURRENT_TIMESTAMP '
+                'WHERE id = ? AND user_id = ? AND lease_owner = ? '
+                'AND lease_expires_at > ?',
+                (completed, task_id, user_id, worker_id, time.time())
+            )
+            conn.commit()
+        if cursor.rowcount and completed:
+            invalidate_user_stats(user_id)
+
+        task = conn.execute(
+            'SELECT * FROM tasks WHERE id = ?', (task_id,)
+        ).fetchone()
+        conn.close()
+
+        if not cursor.rowcount:
+            return jsonify({'error': 'Lease not held'}), 409
+        return jsonify(dict(task))
+
+    def snapshot_access_error():
+        """Snapshots et restaurations exigent le jeton SNAPSHOT_TOKEN."""
+        token = app.config['SNAPSHOT_TOKEN']
+        if not token:
+            return jsonify({'error': 'Not found'}), 404
+        supplied = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            return jsonify({'error': 'Invalid X-Admin-Token header'}), 403
+        return None
+
+    @app.route('/api/snapshots', methods=['POST'])
+    def create_snapshot():
+        error = snapshot_access_error()
+        if error:
+            return error
+        if snapshot_active.is_set():
+            return jsonify({'error': 'Snapshot already running'}), 409
+        threading.Thread(target=run_snapshot, daemon=True).start()
+        return jsonify({'started': True}), 202
+
+    @app.route('/api/snapshots/restore', methods=['POST'])
+    def restore_from_snapshot():
+        """Restaure un snapshot dans la base en service.
+
+        Les statistiques et les réponses d'idempotence en mémoire décrivent
+        l'ancienne base : elles sont vidées une fois la restauration faite.
+        """
+        error = snapshot_access_error()
+        if error:
+            return error
+        data = request.get_json(silent=True) or {}
+        name = data.get('name', 'latest')
+        if not isinstance(name, str) or not re.fullmatch(r'[\w-]+', name):
+            return jsonify({'error': 'Invalid snapshot name'}), 400
+        if not snapshot_lock.acquire(blocking=False):
+            return jsonify({'error': 'Snapshot already running'}), 409
+        try:
+            manifest = snapshots.restore_snapshot(
+                app.config['DB_PATH'], snapshot_store, name
+            )
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 500
+        finally:
+            snapshot_lock.release()
+        reset_caches()
+
+        return jsonify({'restored': manifest['name']})
+
+    @app.route('/api/snapshots/metrics', methods=['GET'])
+    def get_snapshot_metrics():
+        return jsonify({
+            'running': snapshot_active.is_set(),
+            'count': snapshot_metrics['count'],
+            'last': snapshot_metrics['last'],
+            'last_error': snapshot_metrics['last_error'],
+            'latency_ms': {
+                state: {
+                    'requests': len(values),
+                    'p50': percentile(list(values), 50),
+                    'p99': percentile(list(values), 99)
+                }
+                for state, values in request_latencies.items()
+            }
+        })
+
+    def profile_access_error():
+        """Les profils ne sont lisibles qu'avec le jeton PROFILE_TOKEN."""
+        if not app.config['PROFILE_TOKEN']:
+            return jsonify({'error': 'Not found'}), 404
+        if not has_profile_token():
+            return jsonify({'error': 'Invalid X-Profile header'}), 403
+        return None
+
+    @app.route('/api/profiles', methods=['GET'])
+    def get_profiles():
+        error = profile_access_error()
+        if error:
+            return error
+        return jsonify(profiling.list_profiles(app.config['PROFILE_DIR']))
+
+    @app.route('/api/profiles/<name>', methods=['GET'])
+    def get_profile(name):
+        error = profile_access_error()
+        if error:
+            return error
+        return send_from_directory(
+            os.path.abspath(app.config['PROFILE_DIR']), f'{name}.folded',
+            mimetype='text/plain'
+        )
 
     # Tests AWS
     @app.route('/test-lambda')
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark du Task Manager : latence des routes par utilisateur
+"""
+
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from app import create_app, PRIORITY_RANKS
+
+
+TASKS_PER_USER = 50
+USER_COUNTS = [10, 100, 1000]
+DASHBOARD_TASK_COUNTS = [10, 1000, 100000]
+SNAPSHOT_TASKS = 100000
+SNAPSHOT_WRITE_INTERVAL = 0.1
+QUEUE_TASKS = 100000
+QUEUE_WORKERS = 8
+CLAIMS_PER_WORKER = 100
+REQUESTS = 200
+
+
+def seed(db_path, users, tasks_per_user):
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        'INSERT OR IGNORE INTO users (id, username, email) VALUES (?, ?, ?)',
+        [(u, f'user{u}', f'user{u}@bench.local') for u in range(1, users + 1)]
+    )
+    priorities = ['high', 'medium', 'low']
+    conn.executemany(
+        ('INSERT INTO tasks (title, description, priority, priority_rank, '
+         'completed, user_id) VALUES (?, ?, ?, ?, ?, ?)'),
+        [(f'Tache {u}-{i}', f'Description {i}', priorities[i % 3],
+          PRIORITY_RANKS[priorities[i % 3]], i % 2, u)
+         for u in range(1, users + 1) for i in range(tasks_per_user)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(client, path, user_id, headers=None):
+    timings = []
+    for _ in range(REQUESTS):
+        request_headers = {'X-User-Id': str(user_id)}
+        request_headers.update(headers or {})
+        start = time.perf_counter()
+        response = client.get(path, headers=request_headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+    timings.sort()
+    return (statistics.median(timings),
+            timings[int(len(timings) * 0.99) - 1])
+
+
+def bench_users():
+    """Latence list / stats / search en fonction du nombre d'utilisateurs."""
+    print(f'{"users":>6} {"tasks":>8} {"route":<32} {"p50 ms":>8} '
+          f'{"p99 ms":>8}')
+    for users in USER_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.db')
+            os.environ['DB_PATH'] = db_path
+            app = create_app()
+            seed(db_path, users, TASKS_PER_USER)
+            client = app.test_client()
+
+            user_id = users // 2 or 1
+            for route in ['/api/tasks', '/api/stats',
+                          '/api/tasks?q=Tache&completed=0']:
+                p50, p99 = measure(client, route, user_id)
+                print(f'{users:>6} {users * TASKS_PER_USER:>8} '
+                      f'{route:<32} {p50:>8.2f} {p99:>8.2f}')
+
+
+def bench_dashboard():
+    """Latence de la page d'accueil en fonction du nombre de tâches."""
+    print(f'{"tasks":>8} {"route":<32} {"p50 ms":>8} {"p99 ms":>8}')
+    for tasks in DASHBOARD_TASK_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.db')
+            os.environ['DB_PATH'] = db_path
+            app = create_app()
+            seed(db_path, 1, tasks)
+            client = app.test_client()
+
+            for route in ['/', '/?status=pending&priority=high',
+                          '/tasks/page']:
+                p50, p99 = measure(client, route, 1)
+                print(f'{tasks:>8} {route:<32} {p50:>8.2f} {p99:>8.2f}')
+
+
+def bench_snapshot():
+    """Durée des snapshots et effet sur le p99 des requêtes concurrentes.
+
+    La même charge (lectures en continu, une écriture toutes les
+    SNAPSHOT_WRITE_INTERVAL secondes) tourne sans snapshot puis pendant
+    chaque snapshot ; on compare le p99 des lectures.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DB_PATH'] = os.path.join(tmp, 'bench.db')
+        os.environ['SNAPSHOT_DIR'] = os.path.join(tmp, 'snapshots')
+        os.environ['SNAPSHOT_TOKEN'] = 'bench'
+        app = create_app()
+        seed(os.environ['DB_PATH'], 1, SNAPSHOT_TASKS)
+        client = app.test_client()
+        measure(client, '/tasks/page?status=pending', 1)
+
+        def run_load(until):
+            stop = threading.Event()
+            timings = []
+
+            def read():
+                reader = app.test_client()
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    reader.get('/tasks/page?status=pending')
+                    timings.append((time.perf_counter() - start) * 1000)
+
+            def write():
+                writer = app.test_client()
+                while not stop.wait(SNAPSHOT_WRITE_INTERVAL):
+                    writer.post('/api/tasks', json={'title': 'Concurrente'})
+
+            workers = [threading.Thread(target=read),
+                       threading.Thread(target=write)]
+            for worker in workers:
+                worker.start()
+            until()
+            stop.set()
+            for worker in workers:
+                worker.join()
+            timings.sort()
+            return timings[int(len(timings) * 0.99) - 1]
+
+        baseline = run_load(lambda: time.sleep(3))
+        print(f'{"baseline":<14} {"":>12} {"":>24} read p99 {baseline:6.2f} ms')
+
+        def snapshot():
+            response = client.post('/api/snapshots',
+                                   headers={'X-Admin-Token': 'bench'})
+            assert response.status_code == 202
+            while client.get('/api/snapshots/metrics').json['running']:
+                time.sleep(0.2)
+
+        for label in ['initial', 'incremental']:
+            p99 = run_load(snapshot)
+            last = client.get('/api/snapshots/metrics').json['last']
+            print(f"{label:<14} {last['duration_ms']:>9.2f} ms "
+                  f"{last['chunks_uploaded']:>3}/{last['chunks']:<3} chunks "
+                  f"{last['bytes_uploaded']:>9} B  read p99 {p99:6.2f} ms")
+
+
+def bench_claim():
+    """Workers concurrents sur POST /api/tasks/claim : aucun doublon."""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DB_PATH'] = os.path.join(tmp, 'bench.db')
+        app = create_app()
+        seed(os.environ['DB_PATH'], 1, QUEUE_TASKS)
+
+        claimed = []
+        timings = []
+
+        def work(worker_id):
+            client = app.test_client()
+            for _ in range(CLAIMS_PER_WORKER):
+                start = time.perf_counter()
+                response = client.post('/api/tasks/claim', json={
+                    'worker_id': worker_id, 'limit': 5
+                })
+                timings.append((time.perf_counter() - start) * 1000)
+                claimed.extend(task['id'] for task in response.json['tasks'])
+
+        workers = [threading.Thread(target=work, args=(f'worker-{n}',))
+                   for n in range(QUEUE_WORKERS)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        timings.sort()
+        print(f'{QUEUE_WORKERS} workers, {len(claimed)} tasks claimed, '
+              f'{len(claimed) - len(set(claimed))} duplicates, '
+              f'{len(timings) / elapsed:.0f} claims/s, '
+              f'p50 {statistics.median(timings):.2f} ms, '
+              f'p99 {timings[int(len(timings) * 0.99) - 1]:.2f} ms')
+
+
+if __name__ == '__main__':
+    bench_users()
+    print()
+    bench_dashboard()
+    print()
+    bench_snapshot()
+    print()
+    bench_claim()
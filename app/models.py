@@ -6,16 +6,33 @@ db = SQLAlchemy()
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        db.Index('idx_tasks_user_completed_created',
+                 'user_id', 'completed', 'created_at'),
+        db.Index('idx_tasks_user_created', 'user_id', 'created_at'),
+        db.Index('idx_tasks_user_priority_completed_created',
+                 'user_id', 'priority', 'completed', 'created_at'),
+        db.Index('idx_tasks_user_priority_created',
+                 'user_id', 'priority', 'created_at'),
+        db.Index('idx_tasks_user_queue',
+                 'user_id', 'completed', 'priority_rank', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     completed = db.Column(db.Boolean, default=False, nullable=False)
     priority = db.Column(db.String(20), default='medium', nullable=False)
+    # 1 = high, 2 = medium, 3 = low : tri de la file de travail en SQL
+    priority_rank = db.Column(db.Integer, default=2, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow,
                            onupdate=datetime.utcnow)
     due_date = db.Column(db.DateTime, nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'),
+                        nullable=False)
+    lease_owner = db.Column(db.String(200), nullable=True)
+    lease_expires_at = db.Column(db.Float, nullable=True)
 
     def to_dict(self):
         """Convertit l'objet Task en dictionnaire pour JSON"""
@@ -30,7 +47,11 @@ class Task(db.Model):
             'updated_at': (self.updated_at.isoformat()
                            if self.updated_at else None),
             'due_date': (self.due_date.isoformat()
-                         if self.due_date else None)
+                         if self.due_date else None),
+            'user_id': self.user_id,
+            'priority_rank': self.priority_rank,
+            'lease_owner': self.lease_owner,
+            'lease_expires_at': self.lease_expires_at
         }
 
     def __repr__(self):
@@ -44,6 +65,7 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    tasks = db.relationship('Task', backref='user', lazy='dynamic')
 
     def to_dict(self):
         return {
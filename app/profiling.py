@@ -0,0 +1,98 @@
+"""
+Profilage statistique à la demande d'une requête (format flame graph)
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+
+class StackSampler:
+    """Échantillonne la pile d'un thread à intervalle régulier.
+
+    Les piles sont agrégées au format « folded » (une ligne
+    `racine;...;feuille nombre` par pile), lu directement par flamegraph.pl
+    ou speedscope.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.duration_ms = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000,
+                                 2)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} '
+                             f'({os.path.basename(code.co_filename)}:'
+                             f'{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n'
+                       for stack, count in self.stacks.items())
+
+
+def write_profile(directory, sampler, metadata, max_files=50):
+    """Écrit un profil (.folded + .json) et supprime les plus anciens."""
+    os.makedirs(directory, exist_ok=True)
+    name = '{}-{}-{}'.format(
+        datetime.utcnow().strftime('%Y%m%dT%H%M%S%fZ'),
+        metadata['method'], metadata['endpoint']
+    )
+    with open(os.path.join(directory, f'{name}.folded'), 'w') as f:
+        f.write(sampler.folded())
+    metadata = dict(metadata, name=name, duration_ms=sampler.duration_ms,
+                    samples=sum(sampler.stacks.values()),
+                    created_at=datetime.utcnow().isoformat())
+    with open(os.path.join(directory, f'{name}.json'), 'w') as f:
+        json.dump(metadata, f)
+
+    # Rotation : on ne garde que les `max_files` profils les plus récents
+    names = sorted(entry[:-len('.json')] for entry in os.listdir(directory)
+                   if entry.endswith('.json'))
+    for old in names[:-max_files]:
+        for ext in ('.folded', '.json'):
+            try:
+                os.remove(os.path.join(directory, old + ext))
+            except FileNotFoundError:
+                pass
+    return name
+
+
+def list_profiles(directory, limit=50):
+    """Métadonnées des profils les plus récents, du plus récent au plus ancien."""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted((entry for entry in os.listdir(directory)
+                    if entry.endswith('.json')), reverse=True)
+    profiles = []
+    for entry in names[:limit]:
+        try:
+            with open(os.path.join(directory, entry)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Snapshots en ligne de la base SQLite (API de backup) avec envoi incrémental
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from datetime import datetime
+
+
+# Taille des blocs envoyés : multiple de la taille de page SQLite, une page
+# modifiée ne fait renvoyer que le bloc qui la contient
+CHUNK_SIZE = 1024 * 1024
+
+# La compression est découpée en tranches entrecoupées de pauses : sur une
+# petite instance, un bloc compressé d'un coup monopolise le CPU assez
+# longtemps pour dégrader le p99 des requêtes
+COMPRESS_LEVEL = 1
+COMPRESS_SLICE = 64 * 1024
+
+
+class LocalStore:
+    """Stockage des snapshots dans un répertoire local (remplace S3)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, *key.split('/'))
+
+    def put(self, key, body):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+
+class S3Store:
+    """Stockage des snapshots dans un bucket S3."""
+
+    def __init__(self, s3_client, bucket, prefix='snapshots/'):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _is_missing(self, error):
+        return error.response['Error']['Code'] in ('404', 'NoSuchKey')
+
+    def put(self, key, body):
+        self.s3_client.put_object(
+            Bucket=self.bucket, Key=self.prefix + key, Body=body
+        )
+
+    def get(self, key):
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket, Key=self.prefix + key
+            )
+        except self.s3_client.exceptions.ClientError as e:
+            if self._is_missing(e):
+                return None
+            raise
+        return response['Body'].read()
+
+    def exists(self, key):
+        try:
+            self.s3_client.head_object(
+                Bucket=self.bucket, Key=self.prefix + key
+            )
+        except self.s3_client.exceptions.ClientError as e:
+            if self._is_missing(e):
+                return False
+            raise
+        return True
+
+
+def compress_throttled(chunk, slice_sleep):
+    """Compresse un bloc au format gzip, tranche par tranche."""
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+    parts = []
+    for offset in range(0, len(chunk), COMPRESS_SLICE):
+        parts.append(compressor.compress(chunk[offset:offset + COMPRESS_SLICE]))
+        time.sleep(slice_sleep)
+    parts.append(compressor.flush())
+    return b''.join(parts)
+
+
+def load_manifest(store, name='latest'):
+    body = store.get(f'manifests/{name}.json')
+    return json.loads(body) if body else None
+
+
+def take_snapshot(db_path, store, slice_sleep=0.005):
+    """Copie la base en ligne puis envoie les blocs modifiés.
+
+    La copie utilise l'API de backup SQLite en un seul pas, donc dans une
+    seule transaction de lecture : les écritures concurrentes ne la font
+    pas recommencer et, la base étant en mode WAL, ne sont pas bloquées.
+    Le snapshot est ensuite découpé en blocs compressés adressés par leur
+    SHA-256 : seuls les blocs absents du stockage sont envoyés, et un
+    snapshot identique au précédent n'écrit rien. C'est cette étape,
+    la plus coûteuse, qui est ralentie (`slice_sleep` secondes après
+    chaque tranche compressée) pour limiter l'effet sur les requêtes.
+    """
+    start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, 'snapshot.db')
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(snapshot_path)
+        try:
+            source.backup(target, pages=-1)
+            page_count = target.execute('PRAGMA page_count').fetchone()[0]
+        finally:
+            target.close()
+            source.close()
+        copy_ms = (time.perf_counter() - start) * 1000
+
+        latest = load_manifest(store)
+        known_chunks = set(latest['chunks']) if latest else set()
+
+        chunks = []
+        uploaded = 0
+        bytes_uploaded = 0
+        with open(snapshot_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                chunk_hash = hashlib.sha256(chunk).hexdigest()
+                chunks.append(chunk_hash)
+                key = f'chunks/{chunk_hash}.gz'
+                if chunk_hash in known_chunks or store.exists(key):
+                    time.sleep(slice_sleep)
+                    continue
+                body = compress_throttled(chunk, slice_sleep)
+                store.put(key, body)
+                known_chunks.add(chunk_hash)
+                uploaded += 1
+                bytes_uploaded += len(body)
+
+    result = {
+        'copy_ms': round(copy_ms, 2),
+        'pages': page_count,
+        'chunks': len(chunks),
+        'chunks_uploaded': uploaded,
+        'bytes_uploaded': bytes_uploaded,
+        # Empreinte du snapshot : celle de la liste de ses blocs
+        'sha256': hashlib.sha256(''.join(chunks).encode()).hexdigest(),
+        'unchanged': bool(latest) and latest['chunks'] == chunks
+    }
+
+    if not result['unchanged']:
+        name = datetime.utcnow().strftime('%Y%m%dT%H%M%S%fZ')
+        manifest = json.dumps({
+            'name': name,
+            'created_at': datetime.utcnow().isoformat(),
+            'sha256': result['sha256'],
+            'chunk_size': CHUNK_SIZE,
+            'chunks': chunks
+        }).encode()
+        store.put(f'manifests/{name}.json', manifest)
+        store.put('manifests/latest.json', manifest)
+        result['manifest'] = name
+    else:
+        result['manifest'] = latest['name']
+
+    result['duration_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+def restore_snapshot(db_path, store, name='latest'):
+    """Reconstruit un snapshot et le recopie dans `db_path`.
+
+    La recopie passe aussi par l'API de backup, ce qui fonctionne même si
+    l'application a encore des connexions ouvertes sur la base.
+    """
+    manifest = load_manifest(store, name)
+    if manifest is None:
+        raise LookupError(f'Snapshot not found: {name}')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, 'restore.db')
+        with open(snapshot_path, 'wb') as f:
+            for chunk_hash in manifest['chunks']:
+                body = store.get(f'chunks/{chunk_hash}.gz')
+                if body is None:
+                    raise ValueError(f'Missing snapshot chunk: {chunk_hash}')
+                chunk = gzip.decompress(body)
+                if hashlib.sha256(chunk).hexdigest() != chunk_hash:
+                    raise ValueError(
+                        f'Snapshot chunk checksum mismatch: {chunk_hash}'
+                    )
+                f.write(chunk)
+
+        source = sqlite3.connect(snapshot_path)
+        target = sqlite3.connect(db_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+    return manifest
+
+
+def make_store(s3_client=None):
+    """S3 si SNAPSHOT_BUCKET est défini, sinon le répertoire SNAPSHOT_DIR."""
+    bucket = os.environ.get('SNAPSHOT_BUCKET')
+    if bucket and s3_client is not None:
+        return S3Store(s3_client, bucket)
+    return LocalStore(os.environ.get('SNAPSHOT_DIR', 'db-snapshots'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('command', choices=['snapshot', 'restore'])
+    parser.add_argument('--name', default='latest',
+                        help='Manifeste a restaurer (defaut: latest)')
+    args = parser.parse_args()
+
+    s3_client = None
+    if os.environ.get('SNAPSHOT_BUCKET'):
+        import boto3
+        s3_client = boto3.client('s3', region_name='eu-west-1')
+    store = make_store(s3_client)
+    db_path = os.environ.get('DB_PATH', 'taskmanager.db')
+
+    if args.command == 'snapshot':
+        print(json.dumps(take_snapshot(db_path, store), indent=2))
+    else:
+        manifest = restore_snapshot(db_path, store, args.name)
+        print(f"✅ Snapshot {manifest['name']} restaure dans {db_path}")
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import app as app_module  # noqa: E402
+
+
+class FakeAWSClient:
+    """Remplace les clients boto3 : enregistre les appels Lambda."""
+
+    def __init__(self):
+        self.invocations = []
+        self.delay = 0
+
+    def invoke(self, **kwargs):
+        time.sleep(self.delay)
+        self.invocations.append(kwargs)
+        return {}
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    fake = FakeAWSClient()
+    monkeypatch.setattr(app_module.boto3, 'client', lambda *a, **k: fake)
+    return fake
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch, aws):
+    def factory(**env):
+        monkeypatch.setenv('DB_PATH', str(tmp_path / 'test.db'))
+        monkeypatch.setenv('SNAPSHOT_DIR', str(tmp_path / 'snapshots'))
+        monkeypatch.setenv('PROFILE_DIR', str(tmp_path / 'profiles'))
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        return app_module.create_app()
+    return factory
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,98 @@
+import threading
+
+
+def post_task(client, key, title='Tache', user_id=None):
+    headers = {'Idempotency-Key': key}
+    if user_id is not None:
+        headers['X-User-Id'] = str(user_id)
+    return client.post('/api/tasks', json={'title': title}, headers=headers)
+
+
+def count_tasks(client):
+    return len(client.get('/api/tasks').json)
+
+
+def test_replay_returns_original_response(client, aws):
+    before = count_tasks(client)
+    first = post_task(client, 'k1')
+    second = post_task(client, 'k1')
+
+    assert first.status_code == second.status_code == 201
+    assert second.json == first.json
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+    assert count_tasks(client) == before + 1
+    assert len(aws.invocations) == 1
+
+
+def test_key_reused_with_different_payload_is_rejected(client):
+    post_task(client, 'k1', title='A')
+    response = post_task(client, 'k1', title='B')
+
+    assert response.status_code == 422
+
+
+def test_keys_are_scoped_per_user(client):
+    client.post('/api/users', json={'username': 'bob', 'email': 'b@x'})
+    first = post_task(client, 'k1')
+    other = post_task(client, 'k1', user_id=2)
+
+    assert other.status_code == 201
+    assert other.json['id'] != first.json['id']
+
+
+def test_concurrent_duplicates_wait_for_first_request(app, aws):
+    aws.delay = 0.3
+    responses = []
+
+    def send():
+        responses.append(post_task(app.test_client(), 'k1'))
+
+    first = threading.Thread(target=send)
+    first.start()
+    threading.Event().wait(0.1)
+    duplicates = [threading.Thread(target=send) for _ in range(4)]
+    for thread in duplicates:
+        thread.start()
+    for thread in [first] + duplicates:
+        thread.join()
+
+    assert {r.status_code for r in responses} == {201}
+    assert len({r.json['id'] for r in responses}) == 1
+    assert sum('Idempotent-Replayed' in r.headers for r in responses) == 4
+    assert len(aws.invocations) == 1
+
+
+def test_duplicate_times_out_while_first_in_flight(app, aws):
+    app.config['IDEMPOTENCY_WAIT_TIMEOUT'] = 0.05
+    aws.delay = 0.3
+    first = threading.Thread(target=post_task, args=(app.test_client(), 'k1'))
+    first.start()
+    threading.Event().wait(0.1)
+    response = post_task(app.test_client(), 'k1')
+    first.join()
+
+    assert response.status_code == 409
+    assert post_task(app.test_client(), 'k1').status_code == 201
+    assert len(aws.invocations) == 1
+
+
+def test_oldest_keys_are_evicted(make_app):
+    client = make_app(IDEMPOTENCY_MAX_KEYS=2).test_client()
+    first = post_task(client, 'k1')
+    post_task(client, 'k2')
+    post_task(client, 'k3')
+
+    assert post_task(client, 'k3').headers['Idempotent-Replayed'] == 'true'
+    again = post_task(client, 'k1')
+    assert 'Idempotent-Replayed' not in again.headers
+    assert again.json['id'] != first.json['id']
+
+
+def test_expired_keys_are_not_replayed(make_app):
+    client = make_app(IDEMPOTENCY_TTL=0).test_client()
+    first = post_task(client, 'k1')
+    again = post_task(client, 'k1')
+
+    assert 'Idempotent-Replayed' not in again.headers
+    assert again.json['id'] != first.json['id']
@@ -0,0 +1,71 @@
+import base64
+import re
+import sqlite3
+
+import pytest
+
+
+def page_ids(response):
+    return [int(i) for i in re.findall(r'data-id="(\d+)"',
+                                       response.get_data(as_text=True))]
+
+
+def walk(client, query=''):
+    """Parcourt toutes les pages en suivant X-Next-Cursor."""
+    ids = []
+    response = client.get(f'/tasks/page?limit=3{query}')
+    while True:
+        assert response.status_code == 200
+        ids.extend(page_ids(response))
+        cursor = response.headers['X-Next-Cursor']
+        if not cursor:
+            return ids
+        response = client.get(f'/tasks/page?limit=3{query}&cursor={cursor}')
+
+
+@pytest.fixture
+def tasks(app, client):
+    priorities = ['high', 'medium', 'low']
+    for i in range(20):
+        client.post('/api/tasks', json={'title': f'T{i}',
+                                        'priority': priorities[i % 3]})
+    # Quatre dates seulement : les pages traversent des groupes d'ex aequo
+    # que seul l'id départage
+    conn = sqlite3.connect(app.config['DB_PATH'])
+    conn.execute("UPDATE tasks SET created_at = "
+                 "datetime('2024-01-01', '+' || (id % 4) || ' days')")
+    conn.commit()
+    conn.close()
+    return client.get('/api/tasks').json
+
+
+def test_walking_pages_returns_every_task_once(client, tasks):
+    ids = walk(client)
+
+    assert len(ids) == len(set(ids))
+    assert set(ids) == {t['id'] for t in tasks}
+    expected = sorted(tasks, key=lambda t: (t['created_at'], t['id']),
+                      reverse=True)
+    assert ids == [t['id'] for t in expected]
+
+
+def test_cursor_keeps_filters(client, tasks):
+    ids = walk(client, '&status=pending&priority=high')
+
+    expected = {t['id'] for t in tasks
+                if t['priority'] == 'high' and not t['completed']}
+    assert len(ids) == len(set(ids))
+    assert set(ids) == expected
+
+
+@pytest.mark.parametrize('cursor', [
+    'pas-du-base64!',
+    base64.urlsafe_b64encode(b'sans-separateur').decode(),
+    base64.urlsafe_b64encode(b'2024-01-01|abc').decode(),
+    base64.urlsafe_b64encode(f'2024-01-01|{2 ** 63}'.encode()).decode(),
+])
+@pytest.mark.parametrize('path', ['/', '/tasks/page'])
+def test_malformed_cursor_is_rejected(client, path, cursor):
+    response = client.get(f'{path}?cursor={cursor}')
+
+    assert response.status_code == 400
@@ -0,0 +1,48 @@
+def test_profiles_hidden_without_token(make_app):
+    client = make_app(PROFILE_SAMPLE_RATE=1).test_client()
+    client.get('/')
+
+    assert client.get('/api/profiles').status_code == 404
+
+
+def test_profiles_require_token(make_app):
+    client = make_app(PROFILE_TOKEN='secret').test_client()
+
+    assert client.get('/api/profiles').status_code == 403
+    assert client.get('/api/profiles',
+                      headers={'X-Profile': 'wrong'}).status_code == 403
+
+
+def test_non_ascii_profile_header_is_rejected(make_app):
+    client = make_app(PROFILE_TOKEN='secret').test_client()
+    headers = {'X-Profile': 'café'}
+
+    assert client.get('/health', headers=headers).status_code == 200
+    assert client.get('/api/profiles', headers=headers).status_code == 403
+
+
+def test_profiled_request_is_listed_and_downloadable(make_app):
+    client = make_app(PROFILE_TOKEN='secret').test_client()
+    headers = {'X-Profile': 'secret'}
+
+    assert 'X-Profile-Id' not in client.get('/').headers
+    name = client.get('/', headers=headers).headers['X-Profile-Id']
+
+    profiles = client.get('/api/profiles', headers=headers).json
+    assert [p['name'] for p in profiles] == [name]
+    assert profiles[0]['endpoint'] == 'index'
+    response = client.get(f'/api/profiles/{name}', headers=headers)
+    assert response.status_code == 200
+
+
+def test_profile_routes_and_404s_are_not_captured(make_app):
+    client = make_app(PROFILE_TOKEN='secret', PROFILE_SAMPLE_RATE=1,
+                      PROFILE_MAX_FILES=3).test_client()
+    headers = {'X-Profile': 'secret'}
+    client.get('/')
+    client.get('/missing', headers=headers)
+    name = client.get('/api/profiles', headers=headers).json[0]['name']
+    client.get(f'/api/profiles/{name}', headers=headers)
+
+    profiles = client.get('/api/profiles', headers=headers).json
+    assert [p['endpoint'] for p in profiles] == ['index']
@@ -0,0 +1,100 @@
+import sqlite3
+import threading
+
+import pytest
+
+import snapshots
+
+ADMIN = {'X-Admin-Token': 'secret'}
+
+
+@pytest.fixture
+def admin_client(make_app):
+    return make_app(SNAPSHOT_TOKEN='secret').test_client()
+
+
+def test_snapshot_completes_under_concurrent_writes(app, client):
+    # Base de ~1000 pages : une copie par petits pas serait relancée à
+    # chaque écriture concurrente
+    conn = sqlite3.connect(app.config['DB_PATH'])
+    conn.executemany(
+        'INSERT INTO tasks (title, description) VALUES (?, ?)',
+        [(f'Tache {i}', 'x' * 200) for i in range(20000)]
+    )
+    conn.commit()
+    conn.close()
+
+    store = snapshots.make_store()
+    stop = threading.Event()
+    writes = []
+
+    def write():
+        writer = app.test_client()
+        while not stop.wait(0.005):
+            writes.append(writer.post(
+                '/api/tasks', json={'title': 'Concurrente'}
+            ).status_code)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        result = snapshots.take_snapshot(
+            app.config['DB_PATH'], store, slice_sleep=0
+        )
+    finally:
+        stop.set()
+        writer.join()
+
+    assert result['pages'] > 1000
+    assert writes and set(writes) == {201}
+    assert snapshots.load_manifest(store)['name'] == result['manifest']
+
+
+def test_unchanged_snapshot_uploads_nothing(app):
+    store = snapshots.make_store()
+    first = snapshots.take_snapshot(app.config['DB_PATH'], store, 0)
+    second = snapshots.take_snapshot(app.config['DB_PATH'], store, 0)
+
+    assert first['chunks_uploaded'] == first['chunks']
+    assert second['unchanged']
+    assert second['chunks_uploaded'] == 0
+    assert second['manifest'] == first['manifest']
+
+
+def test_restore_resets_in_memory_caches(app, admin_client):
+    client = admin_client
+    snapshots.take_snapshot(app.config['DB_PATH'], snapshots.make_store(), 0)
+    total = client.get('/api/stats').json['total']
+    client.post('/api/tasks', json={'title': 'Apres'},
+                headers={'Idempotency-Key': 'k1'})
+    assert client.get('/api/stats').json['total'] == total + 1
+
+    response = client.post('/api/snapshots/restore', json={},
+                           headers=ADMIN)
+
+    assert response.status_code == 200
+    assert client.get('/api/stats').json['total'] == total
+    replay = client.post('/api/tasks', json={'title': 'Apres'},
+                         headers={'Idempotency-Key': 'k1'})
+    assert 'Idempotent-Replayed' not in replay.headers
+
+
+def test_restore_rejects_unknown_or_invalid_names(admin_client):
+    assert admin_client.post('/api/snapshots/restore', json={'name': 'nope'},
+                             headers=ADMIN).status_code == 404
+    assert admin_client.post('/api/snapshots/restore', json={'name': '../x'},
+                             headers=ADMIN).status_code == 400
+
+
+def test_snapshot_routes_require_the_admin_token(app, client, admin_client):
+    snapshots.take_snapshot(app.config['DB_PATH'], snapshots.make_store(), 0)
+
+    # Sans SNAPSHOT_TOKEN configuré, les routes n'existent pas
+    assert client.post('/api/snapshots').status_code == 404
+    assert client.post('/api/snapshots/restore', json={}).status_code == 404
+
+    for headers in ({}, {'X-Admin-Token': 'wrong'}, {'X-Admin-Token': 'café'}):
+        assert admin_client.post('/api/snapshots',
+                                 headers=headers).status_code == 403
+        assert admin_client.post('/api/snapshots/restore', json={},
+                                 headers=headers).status_code == 403
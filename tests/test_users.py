@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def second_user(client):
+    user = client.post('/api/users', json={
+        'username': 'bob', 'email': 'bob@example.com'
+    }).json
+    return {'X-User-Id': str(user['id'])}
+
+
+def insert_task_directly(app, user_id, title):
+    """Écrit sans passer par l'API, donc sans invalider le cache."""
+    conn = sqlite3.connect(app.config['DB_PATH'])
+    conn.execute('INSERT INTO tasks (title, user_id) VALUES (?, ?)',
+                 (title, user_id))
+    conn.commit()
+    conn.close()
+
+
+def test_users_cannot_touch_each_other_tasks(client, second_user):
+    task = client.post('/api/tasks', json={'title': 'Privee'}).json
+
+    listed = client.get('/api/tasks', headers=second_user).json
+    assert task['id'] not in {t['id'] for t in listed}
+
+    response = client.put(f"/api/tasks/{task['id']}", headers=second_user,
+                          json={'title': 'Volee'})
+    assert response.json == {'error': 'Task not found'}
+
+    response = client.delete(f"/api/tasks/{task['id']}", headers=second_user)
+    assert response.json == {'deleted': False}
+
+    owned = {t['id']: t for t in client.get('/api/tasks').json}
+    assert owned[task['id']]['title'] == 'Privee'
+
+
+def test_write_does_not_invalidate_other_user_stats(app, client, second_user):
+    before = client.get('/api/stats').json
+    insert_task_directly(app, 1, 'Hors API')
+
+    client.post('/api/tasks', headers=second_user, json={'title': 'Autre'})
+
+    # Le cache de l'utilisateur 1 n'a pas été invalidé par l'écriture
+    assert client.get('/api/stats').json == before
+    assert client.get('/api/stats', headers=second_user).json['total'] == 1
+
+
+def test_stats_of_unknown_user_are_not_cached(app, client):
+    headers = {'X-User-Id': '42'}
+    assert client.get('/api/stats', headers=headers).json['total'] == 0
+
+    conn = sqlite3.connect(app.config['DB_PATH'])
+    conn.execute("INSERT INTO users (id, username, email) "
+                 "VALUES (42, 'carol', 'carol@example.com')")
+    conn.commit()
+    conn.close()
+    insert_task_directly(app, 42, 'Nouvelle')
+
+    assert client.get('/api/stats', headers=headers).json['total'] == 1
+
+
+@pytest.mark.parametrize('raw', ['abc', '0', '-1', str(2 ** 63),
+                                 '99999999999999999999'])
+def test_invalid_user_id_header_is_rejected(client, raw):
+    headers = {'X-User-Id': raw}
+    assert client.get('/api/stats', headers=headers).status_code == 400
+    assert client.get('/api/tasks', headers=headers).status_code == 400
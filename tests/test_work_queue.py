@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000000.0]
+    monkeypatch.setattr(app_module.time, 'time', lambda: now[0])
+    return now
+
+
+def claim(client, worker_id='w1', **body):
+    return client.post('/api/tasks/claim',
+                       json=dict(body, worker_id=worker_id))
+
+
+def test_claim_returns_highest_priority_pending_tasks(client):
+    tasks = claim(client, limit=3).json['tasks']
+
+    # Tâches de démonstration : la première tâche haute est déjà terminée
+    assert [t['priority'] for t in tasks] == ['high', 'medium', 'medium']
+    assert {t['lease_owner'] for t in tasks} == {'w1'}
+    assert not any(t['completed'] for t in tasks)
+
+
+def test_leased_tasks_are_not_claimed_again(client):
+    first = {t['id'] for t in claim(client, 'w1', limit=2).json['tasks']}
+    second = {t['id'] for t in claim(client, 'w2', limit=2).json['tasks']}
+
+    assert first and second
+    assert not first & second
+
+
+def test_concurrent_claims_never_share_a_task(app):
+    for i in range(50):
+        app.test_client().post('/api/tasks', json={'title': f'T{i}'})
+    claimed = []
+
+    def work(worker_id):
+        client = app.test_client()
+        while True:
+            tasks = claim(client, worker_id, limit=2).json['tasks']
+            if not tasks:
+                return
+            claimed.extend(t['id'] for t in tasks)
+
+    workers = [threading.Thread(target=work, args=(f'w{n}',))
+               for n in range(6)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len(claimed) == len(set(claimed)) == 55
+
+
+def test_expired_lease_is_claimable_again(client, clock):
+    task = claim(client, 'w1', lease_seconds=10).json['tasks'][0]
+    clock[0] += 11
+
+    again = claim(client, 'w2').json['tasks'][0]
+
+    assert again['id'] == task['id']
+    assert again['lease_owner'] == 'w2'
+
+
+def test_heartbeat_extends_lease(client, clock):
+    task = claim(client, 'w1', lease_seconds=10).json['tasks'][0]
+    clock[0] += 8
+    response = client.post(f"/api/tasks/{task['id']}/heartbeat",
+                           json={'worker_id': 'w1', 'lease_seconds': 10})
+    clock[0] += 8
+
+    assert response.status_code == 200
+    assert task['id'] not in [t['id'] for t in
+                              claim(client, 'w2', limit=10).json['tasks']]
+
+
+def test_heartbeat_rejected_for_other_worker_or_expired_lease(client, clock):
+    task = claim(client, 'w1', lease_seconds=10).json['tasks'][0]
+    url = f"/api/tasks/{task['id']}/heartbeat"
+
+    assert client.post(url, json={'worker_id': 'w2'}).status_code == 409
+    clock[0] += 11
+    assert client.post(url, json={'worker_id': 'w1'}).status_code == 409
+
+
+def test_release_completes_task_and_clears_lease(client):
+    task = claim(client, 'w1').json['tasks'][0]
+    pending = client.get('/api/stats').json['pending']
+
+    response = client.post(f"/api/tasks/{task['id']}/release",
+                           json={'worker_id': 'w1', 'completed': True})
+
+    assert response.status_code == 200
+    assert response.json['completed'] == 1
+    assert response.json['lease_owner'] is None
+    assert client.get('/api/stats').json['pending'] == pending - 1
+    assert client.post(f"/api/tasks/{task['id']}/release",
+                       json={'worker_id': 'w1'}).status_code == 409
+
+
+def test_release_without_completion_makes_task_claimable(client):
+    task = claim(client, 'w1').json['tasks'][0]
+    client.post(f"/api/tasks/{task['id']}/release", json={'worker_id': 'w1'})
+
+    assert claim(client, 'w2').json['tasks'][0]['id'] == task['id']
+
+
+@pytest.mark.parametrize('worker_id', [None, '', ['w'], 42, 'w' * 201])
+def test_invalid_worker_id_is_rejected(client, worker_id):
+    body = {'worker_id': worker_id}
+
+    assert client.post('/api/tasks/claim', json=body).status_code == 400
+    assert client.post('/api/tasks/2/heartbeat', json=body).status_code == 400
+    assert client.post('/api/tasks/2/release', json=body).status_code == 400
+
+
+def test_invalid_claim_parameters_are_rejected(client):
+    assert claim(client, limit='x').status_code == 400
+    assert claim(client, lease_seconds=[1]).status_code == 400
+    assert client.post('/api/tasks/claim', json=['w1']).status_code == 400